@@ -9,9 +9,9 @@ def load(path):
     with open(path, "r", encoding="utf-8") as f:
         return json.load(f)
 
-def main():
-    t = load(TIME_PATH)
-    r = load(TRANSFERS_PATH)
+def main(time_path=TIME_PATH, transfers_path=TRANSFERS_PATH, out_path=OUT_PATH, alpha=ALPHA):
+    t = load(time_path)
+    r = load(transfers_path)
 
     if t["stations"] != r["stations"]:
         raise SystemExit("Station order mismatch between the two JSON files.")
@@ -30,27 +30,27 @@ def main():
             if i == j:
                 row.append(0)
             else:
-                row.append(float(T[i][j]) + ALPHA * float(R[i][j]))
+                row.append(float(T[i][j]) + alpha * float(R[i][j]))
         M.append(row)
 
     out = {
         "stations": t["stations"],
         "mode": t.get("mode", "fastest"),
-        "metric": f"{t.get('metric','minutes')}+{ALPHA}*{r.get('metric','transfers')}",
+        "metric": f"{t.get('metric','minutes')}+{alpha}*{r.get('metric','transfers')}",
         "date": t.get("date"),
         "time": t.get("time"),
-        "alpha": ALPHA,
+        "alpha": alpha,
         "sources": {
-            "time_file": TIME_PATH,
-            "transfers_file": TRANSFERS_PATH
+            "time_file": time_path,
+            "transfers_file": transfers_path
         },
         "matrix": M
     }
 
-    with open(OUT_PATH, "w", encoding="utf-8") as f:
+    with open(out_path, "w", encoding="utf-8") as f:
         json.dump(out, f, ensure_ascii=False, indent=2)
 
-    print(f"Saved -> {OUT_PATH}")
+    print(f"Saved -> {out_path}")
 
 if __name__ == "__main__":
     main()
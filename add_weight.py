@@ -1,6 +1,10 @@
 import json
 from decimal import Decimal, ROUND_HALF_UP
 
+import numpy as np
+
+from matrix_io import stream_load_matrix
+
 T_PATH = "Matrix/Fastest/time_plus_transfers.json"
 C_PATH = "Matrix/Fastest/cost.json"
 R_PATH = "Matrix/Fastest/transfers.json"
@@ -9,22 +13,14 @@ ALPHA, BETA, GAMMA = 0.8, 0.2, 0.2
 OUT_PATH = "Matrix/recommended_weighted_normalized.json"
 
 def load(path):
-    with open(path, "r", encoding="utf-8") as f:
-        return json.load(f)
+    stations, M, meta = stream_load_matrix(path)
+    return {"stations": stations, **meta, "matrix": M}
 
 def max_offdiag(M):
-    m = None
-    n = len(M)
-    for i in range(n):
-        for j in range(n):
-            if i == j:
-                continue
-            v = M[i][j]
-            if v is None:
-                continue
-            v = float(v)
-            if m is None or v > m:
-                m = v
+    M = np.asarray(M, dtype=float)
+    vals = M[~np.eye(len(M), dtype=bool)]
+    vals = vals[~np.isnan(vals)]
+    m = float(vals.max()) if vals.size else None
     if m is None or m == 0:
         raise ValueError("Matrix has no non-diagonal numeric values (or max is 0).")
     return m
@@ -40,15 +36,12 @@ def bmatrix(mat):
     rows = ["  " + " & ".join(f"{x:g}" for x in row) + r" \\" for row in mat]
     return "\\begin{bmatrix}\n" + "\n".join(rows) + "\n\\end{bmatrix}"
 
-def main():
-    Tj, Cj, Rj = load(T_PATH), load(C_PATH), load(R_PATH)
-    if not (Tj["stations"] == Cj["stations"] == Rj["stations"]):
-        raise SystemExit("Station order mismatch across T/C/R.")
-
-    stations = Tj["stations"]
-    T, C, R = Tj["matrix"], Cj["matrix"], Rj["matrix"]
-    n = len(stations)
-
+def weighted_matrix(T, C, R, alpha=ALPHA, beta=BETA, gamma=GAMMA):
+    """
+    W_ij = alpha*T_ij/max(T) + beta*C_ij/max(C) + gamma*R_ij/max(R), rounded to 3sf.
+    Returns: (W as list of lists, {"T": tmax, "C": cmax, "R": rmax})
+    """
+    n = len(T)
     tmax, cmax, rmax = max_offdiag(T), max_offdiag(C), max_offdiag(R)
 
     W = [[0.0]*n for _ in range(n)]
@@ -62,31 +55,44 @@ def main():
             cn = Decimal(str(float(C[i][j]) / cmax))
             rn = Decimal(str(float(R[i][j]) / rmax))
 
-            w = Decimal(str(ALPHA))*tn + Decimal(str(BETA))*cn + Decimal(str(GAMMA))*rn
+            w = Decimal(str(alpha))*tn + Decimal(str(beta))*cn + Decimal(str(gamma))*rn
             W[i][j] = float(round_sig_decimal(w, 3))
 
+    return W, {"T": tmax, "C": cmax, "R": rmax}
+
+def build(t_path=T_PATH, c_path=C_PATH, r_path=R_PATH, alpha=ALPHA, beta=BETA, gamma=GAMMA,
+          out_path=OUT_PATH, latex=True):
+    Tj, Cj, Rj = load(t_path), load(c_path), load(r_path)
+    if not (Tj["stations"] == Cj["stations"] == Rj["stations"]):
+        raise SystemExit("Station order mismatch across T/C/R.")
+
+    stations = Tj["stations"]
+    W, maxes = weighted_matrix(Tj["matrix"], Cj["matrix"], Rj["matrix"], alpha, beta, gamma)
+
     out = {
         "stations": stations,
         "mode": "fastest",
         "metric": "alpha*T_norm + beta*C_norm + gamma*R_norm (3sf)",
         "date": Tj.get("date"),
         "time": Tj.get("time"),
-        "weights": {"alpha": ALPHA, "beta": BETA, "gamma": GAMMA},
-        "max": {"T": tmax, "C": cmax, "R": rmax},
-        "sources": {"T": T_PATH, "C": C_PATH, "R": R_PATH},
+        "weights": {"alpha": alpha, "beta": beta, "gamma": gamma},
+        "max": maxes,
+        "sources": {"T": t_path, "C": c_path, "R": r_path},
         "matrix": W,
     }
 
-    with open(OUT_PATH, "w", encoding="utf-8") as f:
+    with open(out_path, "w", encoding="utf-8") as f:
         json.dump(out, f, ensure_ascii=False, indent=2)
 
-    print(f"Saved -> {OUT_PATH}\n")
+    print(f"Saved -> {out_path}\n")
+    if not latex:
+        return out_path
 
     # LaTeX
     print(r"\[")
     print(
-        rf"\tilde{{M}}_{{ij}} = {ALPHA}\frac{{T_{{ij}}}}{{\max(T)}} + "
-        rf"{BETA}\frac{{C_{{ij}}}}{{\max(C)}} + {GAMMA}\frac{{R_{{ij}}}}{{\max(R)}}"
+        rf"\tilde{{M}}_{{ij}} = {alpha}\frac{{T_{{ij}}}}{{\max(T)}} + "
+        rf"{beta}\frac{{C_{{ij}}}}{{\max(C)}} + {gamma}\frac{{R_{{ij}}}}{{\max(R)}}"
     )
     print(r"\]")
     print("% Station order:")
@@ -94,6 +100,10 @@ def main():
     print(r"\[")
     print(bmatrix(W))
     print(r"\]")
+    return out_path
+
+def main():
+    build()
 
 if __name__ == "__main__":
     main()
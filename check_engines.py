@@ -0,0 +1,277 @@
+"""
+Differential check of every k-best solver engine.
+
+    python check_engines.py                  # correctness + throughput
+    python check_engines.py --trials 500 --seed 7
+    python check_engines.py --skip-speed
+
+Random asymmetric matrices (uniform, heavy ties, zeros, missing None/NaN
+cells) are solved by every engine in ENGINES and compared against:
+  - a brute-force itertools.permutations oracle for n <= ORACLE_MAX_N
+  - the reference dict DP (heldKarp_algorithm) for larger n
+Ties make the exact order of equal-cost tours engine-specific, so a result
+is accepted when its tours are valid, distinct, correctly costed, sorted,
+and their costs match the expected top-k costs. Every engine gets the raw
+matrix, NaN cells included; missing cells are unreachable edges and only
+finite tours are compared.
+
+It also round-trips the same matrices, with inf and NaN cells, through
+matrix_io.stream_dump_matrix and back via stream_load_matrix and json.load.
+
+The throughput check times each engine against the reference dict DP,
+interleaved round by round, and fails if the median ratio falls below the
+engine's MIN_SPEEDUP floor. The floors are about 0.6x the ratios measured
+on the development machine, so there a 2x regression fails the check.
+It also times HeldKarpTable.update_edges for single-edge changes against a
+fresh build of the same table and fails above MAX_UPDATE_RATIO, which
+catches the incremental path degrading into full rebuilds.
+Exits non-zero on any failure.
+"""
+import argparse
+import itertools
+import json
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+import heldKarp_algorithm
+import heldKarp_algorithm_onefile
+from heldKarp_algorithm import score_tours
+from heldKarp_array import HeldKarpTable, k_best_tsp_held_karp_array
+from matrix_io import stream_dump_matrix, stream_load_matrix
+
+ORACLE_MAX_N = 9
+# median ratios measured at n=12, k=3: onefile 1.0-1.1x, array 10.4-12.8x,
+# float32 14.3-15.5x, int32 14.6-15.8x, int64 12.8-13.9x, array-update 6.3-9.1x
+MIN_SPEEDUP = {"onefile": 0.65, "array": 7.0, "array-float32": 9.0, "array-int32": 9.0,
+               "array-int64": 8.0, "array-update": 5.0}
+# one-edge update_edges / fresh build: ~0.35 measured, ~0.92 when every update rebuilds
+MAX_UPDATE_RATIO = 0.6
+SPEED_N, SPEED_K = 12, 3
+
+# ----------------------------
+# ENGINES
+# ----------------------------
+def _finite(W):
+    return np.where(np.isnan(W), np.inf, W)
+
+def _array_update(W, start, k):
+    """Build on a perturbed matrix, then repair back to W with update_edges."""
+    n = W.shape[0]
+    rng = np.random.default_rng(n * 31 + start)
+    cells = {(int(a), int(b)) for a, b in rng.integers(0, n, (2, 2))}
+    W2 = W.copy()
+    for a, b in cells:
+        W2[a, b] = 0.0 if np.isnan(W[a, b]) else W[a, b] * 2 + 1
+    table = HeldKarpTable(W2, start, k)
+    return table.update_edges({(a, b): (None if np.isnan(W[a, b]) else W[a, b]) for a, b in cells})
+
+ENGINES = {
+    # name: (solve(W, start, k), cost tolerance)
+    "dict": (lambda W, s, k: heldKarp_algorithm.k_best_tsp_held_karp(W, s, k), 1e-9),
+    "onefile": (lambda W, s, k: heldKarp_algorithm_onefile.k_best_tsp_held_karp(W, s, k), 1e-9),
+    "array": (lambda W, s, k: k_best_tsp_held_karp_array(W, s, k), 1e-9),
+    "array-float32": (lambda W, s, k: k_best_tsp_held_karp_array(W, s, k, np.float32), 1e-9),
+    "array-int32": (lambda W, s, k: k_best_tsp_held_karp_array(W, s, k, np.int32), 1e-9),
+    "array-int64": (lambda W, s, k: k_best_tsp_held_karp_array(W, s, k, np.int64), 1e-9),
+    "array-update": (_array_update, 1e-9),
+}
+
+# ----------------------------
+# ORACLE / MATRICES
+# ----------------------------
+def all_tours(n: int, start: int) -> np.ndarray:
+    others = [v for v in range(n) if v != start]
+    perms = np.array(list(itertools.permutations(others)), dtype=np.intp).reshape(-1, n - 1)
+    col = np.full((len(perms), 1), start, dtype=np.intp)
+    return np.hstack([col, perms, col])
+
+def oracle_costs(W: np.ndarray, start: int, k: int) -> list[float]:
+    """Top-k finite tour costs by brute force."""
+    costs = score_tours(all_tours(W.shape[0], start), _finite(W))[:, 0]
+    costs = np.sort(costs[np.isfinite(costs)])
+    return [float(c) for c in costs[:k]]
+
+def random_matrix(rng, n: int, kind: str) -> np.ndarray:
+    """kinds: uniform, ties, zeros, missing. Values are 3-decimal like the 3sf weights."""
+    if kind == "ties":
+        W = rng.integers(0, 3, (n, n)).astype(float)
+    elif kind == "zeros":
+        W = np.round(rng.random((n, n)), 3) * (rng.random((n, n)) < 0.3)
+    else:
+        W = np.round(rng.random((n, n)) * 10, 3)
+    np.fill_diagonal(W, 0.0)
+    if kind == "missing":
+        rows = W.tolist()  # go through None like a crawled JSON matrix
+        for a, b in rng.integers(0, n, (max(1, n // 2), 2)):
+            if a != b:
+                rows[a][b] = None
+        W = np.array(rows, dtype=float)
+    return W
+
+# ----------------------------
+# CHECKS
+# ----------------------------
+def check_result(W, start, k, got, expected, tol) -> list[str]:
+    """Return a list of problems with `got` (empty when it matches `expected` costs)."""
+    n = W.shape[0]
+    errors = []
+    got = [(c, p) for c, p in got if np.isfinite(c)]
+    if len(got) != len(expected):
+        return [f"{len(got)} finite tours, expected {len(expected)}"]
+
+    seen = set()
+    exact = []
+    for cost, path in got:
+        if path[0] != start or path[-1] != start or sorted(path[:-1]) != list(range(n)):
+            errors.append(f"invalid tour {path}")
+            continue
+        if tuple(path) in seen:
+            errors.append(f"duplicate tour {path}")
+        seen.add(tuple(path))
+        true = float(score_tours([path], _finite(W))[0, 0])
+        if abs(true - cost) > tol * max(1.0, abs(true)):
+            errors.append(f"tour {path} reported {cost!r}, actual {true!r}")
+        exact.append(true)
+
+    if errors:
+        return errors
+    if any(b < a - tol for a, b in zip(exact, exact[1:])):
+        errors.append(f"costs not sorted: {exact}")
+    if any(abs(a - b) > tol * max(1.0, abs(b)) for a, b in zip(exact, expected)):
+        errors.append(f"costs {exact} != expected {expected}")
+    return errors
+
+def run_differential(trials: int, seed: int, max_n: int) -> int:
+    rng = np.random.default_rng(seed)
+    kinds = ["uniform", "ties", "zeros", "missing"]
+    failures = 0
+    for t in range(trials):
+        n = int(rng.integers(2, max_n + 1))
+        k = int(rng.integers(1, 6))
+        start = int(rng.integers(0, n))
+        kind = kinds[t % len(kinds)]
+        W = random_matrix(rng, n, kind)
+
+        if n <= ORACLE_MAX_N:
+            expected, source = oracle_costs(W, start, k), "oracle"
+        else:
+            ref = heldKarp_algorithm.k_best_tsp_held_karp(W, start, k)
+            expected, source = [c for c, _p in ref if np.isfinite(c)], "reference DP"
+
+        for name, (solve, tol) in ENGINES.items():
+            errors = check_result(W, start, k, solve(W, start, k), expected, tol)
+            if errors:
+                failures += 1
+                print(f"FAIL {name} vs {source}: trial={t} n={n} k={k} start={start} kind={kind}")
+                for e in errors[:3]:
+                    print("   ", e)
+    print(f"differential: {trials} matrices x {len(ENGINES)} engines, {failures} failure(s)")
+    return failures
+
+def run_roundtrip(trials: int, seed: int, max_n: int) -> int:
+    """Dump matrices with NaN/inf cells and read them back; non-finite cells must come back as NaN."""
+    rng = np.random.default_rng(seed)
+    failures = 0
+    fd, path = tempfile.mkstemp(suffix=".json")
+    os.close(fd)
+    try:
+        for t in range(trials):
+            n = int(rng.integers(2, max_n + 1))
+            W = random_matrix(rng, n, "missing")
+            W[rng.random((n, n)) < 0.1] = np.inf
+            stations = [f"s{i}" for i in range(n)]
+            stream_dump_matrix(path, stations, W, {"trial": t})
+            expected = np.where(np.isfinite(W), W, np.nan)
+            try:
+                st, got, meta = stream_load_matrix(path)
+                with open(path, "r", encoding="utf-8") as f:
+                    raw = np.array(json.load(f)["matrix"], dtype=float)
+            except ValueError as e:
+                failures += 1
+                print(f"FAIL roundtrip: trial={t} n={n}: {e}")
+                continue
+            if (st != stations or meta != {"trial": t}
+                    or not np.array_equal(got, expected, equal_nan=True)
+                    or not np.array_equal(raw, expected, equal_nan=True)):
+                failures += 1
+                print(f"FAIL roundtrip: trial={t} n={n}: matrix changed")
+    finally:
+        os.remove(path)
+    print(f"roundtrip: {trials} matrices, {failures} failure(s)")
+    return failures
+
+def run_throughput(n: int = SPEED_N, k: int = SPEED_K, repeat: int = 5, seed: int = 0) -> int:
+    W = random_matrix(np.random.default_rng(seed), n, "uniform")
+    ratios = {name: [] for name in ENGINES}
+    times = {name: [] for name in ENGINES}
+    for _ in range(repeat):
+        # interleave engines so machine load hits the reference and each engine alike
+        rnd = {}
+        for name, (solve, _tol) in ENGINES.items():
+            t0 = time.perf_counter()
+            solve(W, 0, k)
+            rnd[name] = time.perf_counter() - t0
+        for name, sec in rnd.items():
+            ratios[name].append(rnd["dict"] / sec)
+            times[name].append(sec)
+
+    failures = 0
+    for name in ENGINES:
+        speedup = float(np.median(ratios[name]))
+        floor = MIN_SPEEDUP.get(name)
+        status = "ok"
+        if floor is not None and speedup < floor:
+            status = f"FAIL (< {floor:g}x)"
+            failures += 1
+        print(f"{name:>14}: {min(times[name]) * 1000:9.1f} ms  {speedup:6.2f}x vs dict  {status}")
+
+    failures += _update_ratio(W, k, repeat=3, seed=seed)
+    print(f"throughput: n={n} k={k}, {failures} failure(s)")
+    return failures
+
+def _update_ratio(W, k: int, repeat: int, seed: int) -> int:
+    """update_edges time for single non-start edges, relative to a fresh HeldKarpTable build."""
+    n = W.shape[0]
+    rng = np.random.default_rng(seed + 1)
+    cells = [(int(a), int(b)) for a, b in rng.integers(1, n, (4 * n, 2)) if a != b][:5]
+    build = update = 0.0
+    for a, b in cells:
+        best_build = best_update = None
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            table = HeldKarpTable(W, 0, k)
+            t1 = time.perf_counter()
+            table.update_edges({(a, b): W[a, b] * 2 + 1})
+            t2 = time.perf_counter()
+            best_build = t1 - t0 if best_build is None else min(best_build, t1 - t0)
+            best_update = t2 - t1 if best_update is None else min(best_update, t2 - t1)
+        build += best_build
+        update += best_update
+
+    ratio = update / build
+    status = "ok"
+    if ratio > MAX_UPDATE_RATIO:
+        status = f"FAIL (> {MAX_UPDATE_RATIO:.2f})"
+    print(f"{'update_edges':>14}: {update / len(cells) * 1000:9.1f} ms  {ratio:6.2f}x of a build  {status}")
+    return 0 if status == "ok" else 1
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="Differential check of the k-best solver engines")
+    p.add_argument("--trials", type=int, default=200)
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--max-n", dest="max_n", type=int, default=11)
+    p.add_argument("--skip-speed", dest="skip_speed", action="store_true")
+    args = p.parse_args(argv)
+
+    failures = run_differential(args.trials, args.seed, args.max_n)
+    failures += run_roundtrip(args.trials, args.seed, args.max_n)
+    if not args.skip_speed:
+        failures += run_throughput()
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
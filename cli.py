@@ -0,0 +1,314 @@
+"""
+Non-interactive entry point for the whole toolchain.
+
+    python cli.py crawl --mode fastest --metric minutes
+    python cli.py transform weight --alpha 0.8 --beta 0.2 --gamma 0.2
+    python cli.py solve --W Matrix/Efficient/weighted_normalized.json --k 5
+    python cli.py sweep --weights 0.8,0.2,0.2 0.5,0.3,0.2
+    python cli.py bench --W Matrix/Efficient/weighted_normalized.json --engines dict array
+    python cli.py batch jobs.json --workers 4
+
+A job file is a JSON (or YAML, with PyYAML installed) list of jobs, or
+{"defaults": {...}, "jobs": [...]}. Each job is {"command": <name>, ...}
+where the remaining keys are the keyword arguments of the matching run_*
+function below; each default is only applied to jobs whose function accepts
+it. Results are printed to stdout as JSON; progress messages from the
+underlying scripts go to stderr.
+
+The run_* functions are importable, and matrices are memoized per process,
+so one interpreter can run hundreds of solves without re-reading files.
+"""
+import argparse
+import inspect
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import redirect_stdout
+from functools import lru_cache
+
+import numpy as np
+
+import heldKarp_algorithm as hk
+from matrix_io import stream_load_matrix
+from route_store import ROUTES_FILE, RouteStore, itinerary
+
+# ----------------------------
+# MATRIX MEMO
+# ----------------------------
+@lru_cache(maxsize=64)
+def _load(path: str, mtime_ns: int):
+    stations, mat, meta = stream_load_matrix(path)
+    mat.flags.writeable = False  # shared between jobs
+    return stations, mat, meta
+
+def load_cached(path: str):
+    """stream_load_matrix, memoized on (absolute path, mtime)."""
+    path = os.path.abspath(path)
+    return _load(path, os.stat(path).st_mtime_ns)
+
+def _named(stations, tours, store: RouteStore = None, route_mode: str = hk.ROUTE_MODE):
+    out = []
+    for t in tours:
+        row = {"w": t["w"], "route": [stations[i] for i in t["path"]], "path": t["path"], "totals": t["totals"]}
+        if store is not None:
+            row["legs"] = itinerary(store, stations, t["path"], route_mode)
+        out.append(row)
+    return out
+
+# ----------------------------
+# COMMANDS
+# ----------------------------
+def run_crawl(mode: str, metric: str, delay: float = 0.25, retry: int = 1, out: str = None,
+              routes: str = ROUTES_FILE):
+    import create_matrix  # needs `requests` and an API key, so only on demand
+    out_base = create_matrix.crawl(mode, metric, delay=delay, retry=retry, out_base=out, routes_file=routes)
+    return {"out_base": out_base}
+
+def run_transform(kind: str, **kwargs):
+    """kind: "weight" (add_weight), "transfer" (add_transfer) or "efficiency" (find_efficiency)."""
+    if kind == "weight":
+        import add_weight
+        return {"out": add_weight.build(latex=False, **kwargs)}
+    if kind == "transfer":
+        import add_transfer
+        add_transfer.main(**kwargs)
+        return {"out": kwargs.get("out_path", add_transfer.OUT_PATH)}
+    if kind == "efficiency":
+        import find_efficiency
+        find_efficiency.main(**kwargs)
+        return {"out": kwargs.get("out", find_efficiency.OUT)}
+    raise ValueError(f"Unknown transform kind: {kind}")
+
+def run_solve(W: str = hk.W_FILE, T: str = hk.T_FILE, C: str = hk.C_FILE, R: str = hk.R_FILE,
+              start: str = hk.START_STATION, k: int = hk.K, engine: str = hk.ENGINE,
+              cost_dtype: str = hk.COST_DTYPE, cache: str = None, routes: str = None,
+              route_mode: str = hk.ROUTE_MODE, verify: bool = hk.VERIFY_COMPACT):
+    """
+    routes: RouteStore file; when given, each tour also gets its per-leg itinerary.
+    verify: cross-check a compact cost_dtype against float64 (see check_compact).
+    """
+    stations, metaW, tours = hk.solve(W, T, C, R, start, k, engine, cost_dtype, cache,
+                                      loader=load_cached, verify=verify)
+    store = RouteStore(routes) if routes else None
+    return {"W": W, "metric": metaW.get("metric"), "tours": _named(stations, tours, store, route_mode)}
+
+def run_sweep(weights: list, T: str = "Matrix/Fastest/time_plus_transfers.json",
+              C: str = "Matrix/Fastest/cost.json", R: str = "Matrix/Fastest/transfers.json",
+              start: str = hk.START_STATION, k: int = hk.K, engine: str = hk.ENGINE,
+              cost_dtype: str = hk.COST_DTYPE):
+    """Solve the add_weight objective for each (alpha, beta, gamma) in weights, in memory."""
+    from add_weight import weighted_matrix
+
+    stations, Tm, _ = load_cached(T)
+    reports = {"T": Tm}
+    for name, path in [("C", C), ("R", R)]:
+        st, M, _ = load_cached(path)
+        if st != stations:
+            raise ValueError(f"Station order mismatch between T and {name} file.")
+        reports[name] = M
+    s = stations.index(start)
+
+    out = []
+    for alpha, beta, gamma in weights:
+        W, _maxes = weighted_matrix(reports["T"], reports["C"], reports["R"], alpha, beta, gamma)
+        tours = hk.solve_matrix(np.array(W), s, k, reports, engine, cost_dtype)
+        out.append({"weights": [alpha, beta, gamma], "tours": _named(stations, tours)})
+    return out
+
+def run_bench(W: str = hk.W_FILE, start: str = hk.START_STATION, k: int = hk.K,
+              engines: list = ("dict", "array"), cost_dtypes: list = ("float64",), repeat: int = 3):
+    """Best-of-`repeat` wall time per engine / cost dtype (no cache)."""
+    stations, Wm, _ = load_cached(W)
+    s = stations.index(start)
+    out = []
+    for engine in engines:
+        for dt in (cost_dtypes if engine == "array" else ["float64"]):
+            best = None
+            for _ in range(repeat):
+                t0 = time.perf_counter()
+                tours = hk.solve_matrix(Wm, s, k, engine=engine, cost_dtype=dt)
+                el = time.perf_counter() - t0
+                best = el if best is None else min(best, el)
+            out.append({"engine": engine, "cost_dtype": dt, "n": len(stations), "k": k,
+                        "seconds": best, "best_w": tours[0]["w"] if tours else None})
+    return out
+
+COMMANDS = {
+    "crawl": run_crawl,
+    "transform": run_transform,
+    "solve": run_solve,
+    "sweep": run_sweep,
+    "bench": run_bench,
+}
+
+# ----------------------------
+# BATCH
+# ----------------------------
+def load_jobs(path: str) -> list[dict]:
+    with open(path, "r", encoding="utf-8") as f:
+        if path.endswith((".yaml", ".yml")):
+            try:
+                import yaml
+            except ImportError:
+                raise SystemExit("YAML job files need PyYAML (pip install pyyaml); or use JSON.")
+            data = yaml.safe_load(f)
+        else:
+            data = json.load(f)
+
+    if isinstance(data, list):
+        return data
+    if isinstance(data, dict) and "jobs" in data:
+        defaults = data.get("defaults", {})
+        jobs = []
+        for job in data["jobs"]:
+            accepted = _job_params(job)
+            applied = {key: v for key, v in defaults.items() if accepted is None or key in accepted}
+            jobs.append({**applied, **job})
+        return jobs
+    raise ValueError(f"Unrecognized job file format in {path}")
+
+def _job_params(job: dict):
+    """Keyword names the job's target function accepts (None = unknown, accept all)."""
+    fn = COMMANDS.get(job.get("command"))
+    if fn is run_transform:
+        kind = job.get("kind")
+        if kind == "weight":
+            import add_weight
+            fn = add_weight.build
+        elif kind == "transfer":
+            import add_transfer
+            fn = add_transfer.main
+        elif kind == "efficiency":
+            import find_efficiency
+            fn = find_efficiency.main
+        else:
+            return {"kind"}
+        return set(inspect.signature(fn).parameters) - {"latex"} | {"kind"}
+    if fn is None:
+        return None
+    return set(inspect.signature(fn).parameters)
+
+def run_job(job: dict):
+    job = dict(job)
+    command = job.pop("command")
+    if command not in COMMANDS:
+        return {"command": command, "error": f"Unknown command: {command}"}
+    try:
+        # the scripts print progress; keep stdout for the result JSON
+        with redirect_stdout(sys.stderr):
+            return {"command": command, "result": COMMANDS[command](**job)}
+    except Exception as e:
+        return {"command": command, "error": f"{type(e).__name__}: {e}"}
+
+def run_batch(jobs: list[dict], workers: int = None):
+    """Run independent jobs on a process pool (workers=1 runs them in this process)."""
+    if workers == 1 or len(jobs) <= 1:
+        return [run_job(job) for job in jobs]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(run_job, jobs))
+
+# ----------------------------
+# ARGPARSE
+# ----------------------------
+def _triple(s: str):
+    parts = [float(x) for x in s.split(",")]
+    if len(parts) != 3:
+        raise argparse.ArgumentTypeError("expected alpha,beta,gamma")
+    return parts
+
+def build_parser():
+    p = argparse.ArgumentParser(prog="cli.py", description="Tokyo-Train Held–Karp toolchain")
+    sub = p.add_subparsers(dest="command", required=True)
+
+    c = sub.add_parser("crawl", help="query the route API for every station pair")
+    c.add_argument("--mode", required=True, choices=["fastest", "cheapest"])
+    c.add_argument("--metric", required=True, choices=["minutes", "fare", "transfers"])
+    c.add_argument("--delay", type=float, default=0.25)
+    c.add_argument("--retry", type=int, default=1)
+    c.add_argument("--out", help="output base path (without .csv/.json)")
+    c.add_argument("--routes", default=ROUTES_FILE, help="RouteStore file for per-leg details")
+
+    t = sub.add_parser("transform", help="build derived matrices")
+    tsub = t.add_subparsers(dest="kind", required=True)
+    tw = tsub.add_parser("weight", help="add_weight: weighted normalized W")
+    tw.add_argument("--t-path", dest="t_path")
+    tw.add_argument("--c-path", dest="c_path")
+    tw.add_argument("--r-path", dest="r_path")
+    tw.add_argument("--alpha", type=float)
+    tw.add_argument("--beta", type=float)
+    tw.add_argument("--gamma", type=float)
+    tw.add_argument("--out-path", dest="out_path")
+    tt = tsub.add_parser("transfer", help="add_transfer: time + alpha*transfers")
+    tt.add_argument("--time-path", dest="time_path")
+    tt.add_argument("--transfers-path", dest="transfers_path")
+    tt.add_argument("--alpha", type=float)
+    tt.add_argument("--out-path", dest="out_path")
+    te = tsub.add_parser("efficiency", help="find_efficiency: per-pair fastest/cheapest choice")
+    te.add_argument("--v", type=float)
+
+    s = sub.add_parser("solve", help="k-best tours for one objective")
+    s.add_argument("--W", default=hk.W_FILE)
+    s.add_argument("--T", default=hk.T_FILE)
+    s.add_argument("--C", default=hk.C_FILE)
+    s.add_argument("--R", default=hk.R_FILE)
+    s.add_argument("--start", default=hk.START_STATION)
+    s.add_argument("--k", type=int, default=hk.K)
+    s.add_argument("--engine", default=hk.ENGINE, choices=["dict", "array"])
+    s.add_argument("--cost-dtype", dest="cost_dtype", default=hk.COST_DTYPE)
+    s.add_argument("--cache", help="TourCache file")
+    s.add_argument("--verify", action="store_true", default=None,
+                   help="check a compact --cost-dtype optimum against float64")
+    s.add_argument("--routes", help="RouteStore file; adds per-leg itineraries")
+    s.add_argument("--route-mode", dest="route_mode", default=hk.ROUTE_MODE,
+                   choices=["fastest", "cheapest", "efficient"])
+
+    w = sub.add_parser("sweep", help="solve the weighted objective for several weight triples")
+    w.add_argument("--weights", type=_triple, nargs="+", required=True, metavar="A,B,G")
+    w.add_argument("--T", default="Matrix/Fastest/time_plus_transfers.json")
+    w.add_argument("--C", default="Matrix/Fastest/cost.json")
+    w.add_argument("--R", default="Matrix/Fastest/transfers.json")
+    w.add_argument("--start", default=hk.START_STATION)
+    w.add_argument("--k", type=int, default=hk.K)
+    w.add_argument("--engine", default=hk.ENGINE, choices=["dict", "array"])
+    w.add_argument("--cost-dtype", dest="cost_dtype", default=hk.COST_DTYPE)
+
+    b = sub.add_parser("bench", help="time the solver engines")
+    b.add_argument("--W", default=hk.W_FILE)
+    b.add_argument("--start", default=hk.START_STATION)
+    b.add_argument("--k", type=int, default=hk.K)
+    b.add_argument("--engines", nargs="+", default=["dict", "array"])
+    b.add_argument("--cost-dtypes", dest="cost_dtypes", nargs="+", default=["float64"])
+    b.add_argument("--repeat", type=int, default=3)
+
+    j = sub.add_parser("batch", help="run a JSON/YAML job file")
+    j.add_argument("jobfile")
+    j.add_argument("--workers", type=int, default=None, help="process pool size (1 = in-process)")
+    j.add_argument("--out", help="write results JSON here instead of stdout")
+    return p
+
+def main(argv=None):
+    args = vars(build_parser().parse_args(argv))
+    command = args.pop("command")
+
+    if command == "batch":
+        results = run_batch(load_jobs(args["jobfile"]), args["workers"])
+        if args["out"]:
+            with open(args["out"], "w", encoding="utf-8") as f:
+                json.dump(results, f, ensure_ascii=False, indent=2)
+            print(f"Saved -> {args['out']}", file=sys.stderr)
+        else:
+            json.dump(results, sys.stdout, ensure_ascii=False, indent=2)
+            print()
+        return 1 if any("error" in r for r in results) else 0
+
+    kwargs = {key: v for key, v in args.items() if v is not None}
+    with redirect_stdout(sys.stderr):
+        result = COMMANDS[command](**kwargs)
+    json.dump(result, sys.stdout, ensure_ascii=False, indent=2)
+    print()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,9 +1,10 @@
 # pip install requests
 import time
 import csv
-import json
 
 from main import get_routes, station_list
+from matrix_io import stream_dump_matrix
+from route_store import ROUTES_FILE, RouteStore
 
 
 STATIONS = list(station_list.keys())  
@@ -38,27 +39,20 @@ def matrix_to_latex(matrix, na="NA"):
     return "\\begin{bmatrix}\n" + "\n".join(rows) + "\n\\end{bmatrix}"
 
 
-def main():
-    print("Choose route mode:")
-    print("  1) Fastest")
-    print("  2) Cheapest")
-    mode_in = input("Mode (1/2): ").strip()
-    mode = MODE_CHOICES.get(mode_in)
-    if not mode:
-        raise SystemExit("Invalid mode. Choose 1 or 2.")
-
-    print("\nChoose matrix metric:")
-    print("  1) Duration (minutes)")
-    print("  2) Fare (yen)")
-    print("  3) Transfers (count)")
-    metric_in = input("Metric (1/2/3): ").strip()
-    metric = METRIC_CHOICES.get(metric_in)
-    if not metric:
-        raise SystemExit("Invalid metric. Choose 1, 2, or 3.")
-
-    delay = 0.25  
-    retry = 1
-
+def crawl(mode: str, metric: str, delay: float = 0.25, retry: int = 1, out_base: str = None,
+          routes_file: str = ROUTES_FILE):
+    """
+    Non-interactive crawl: query every ordered station pair, then save
+    <out_base>.csv / <out_base>.json. The chosen course per pair (lines,
+    minutes, fare, transfers) is kept in the RouteStore at routes_file.
+    Returns the output base path.
+    """
+    if mode not in MODE_CHOICES.values():
+        raise ValueError(f"Invalid mode: {mode}")
+    if metric not in METRIC_CHOICES.values():
+        raise ValueError(f"Invalid metric: {metric}")
+
+    store = RouteStore(routes_file)
     n = len(STATIONS)
     matrix = [[0 for _ in range(n)] for __ in range(n)]
 
@@ -70,6 +64,8 @@ def main():
 
             r = best_route(frm, to, mode=mode, retry=retry)
             matrix[i][j] = r[metric] if r else None
+            if r:
+                store.add(frm, to, mode, r)
 
             print(f"{frm:>12} -> {to:<12} = {matrix[i][j]}")
             time.sleep(delay)
@@ -81,24 +77,47 @@ def main():
     print(matrix)
 
     # Save CSV + JSON
-    out_base = f"matrix_{mode}_{metric}_20251128_1200"
+    out_base = out_base or f"matrix_{mode}_{metric}_20251128_1200"
     with open(out_base + ".csv", "w", newline="", encoding="utf-8") as f:
         w = csv.writer(f)
         w.writerow([""] + STATIONS)
         for name, row in zip(STATIONS, matrix):
             w.writerow([name] + row)
 
-    with open(out_base + ".json", "w", encoding="utf-8") as f:
-        json.dump(
-            {"stations": STATIONS, "mode": mode, "metric": metric, "date": 20251128, "time": 1200, "matrix": matrix},
-            f,
-            ensure_ascii=False,
-            indent=2,
-        )
+    stream_dump_matrix(
+        out_base + ".json",
+        STATIONS,
+        matrix,
+        {"mode": mode, "metric": metric, "date": 20251128, "time": 1200},
+    )
+
+    store.save()
 
     print(f"\nSaved: {out_base}.csv and {out_base}.json")
     print("\nLaTeX bmatrix (paste into your IA):")
     print(matrix_to_latex(matrix, na="NA"))
+    return out_base
+
+
+def main():
+    print("Choose route mode:")
+    print("  1) Fastest")
+    print("  2) Cheapest")
+    mode_in = input("Mode (1/2): ").strip()
+    mode = MODE_CHOICES.get(mode_in)
+    if not mode:
+        raise SystemExit("Invalid mode. Choose 1 or 2.")
+
+    print("\nChoose matrix metric:")
+    print("  1) Duration (minutes)")
+    print("  2) Fare (yen)")
+    print("  3) Transfers (count)")
+    metric_in = input("Metric (1/2/3): ").strip()
+    metric = METRIC_CHOICES.get(metric_in)
+    if not metric:
+        raise SystemExit("Invalid metric. Choose 1, 2, or 3.")
+
+    crawl(mode, metric)
 
 
 if __name__ == "__main__":
@@ -2,6 +2,9 @@ import json
 import glob
 import os
 
+from matrix_io import stream_dump_matrix
+from route_store import ROUTES_FILE, RouteStore
+
 V = 900  # yen per hour saved threshold
 
 FILES = {
@@ -25,13 +28,7 @@ def load_matrix(path):
     return d["stations"], d["matrix"], d
 
 def dump_matrix(path, stations, matrix, meta):
-    out = {
-        "stations": stations,
-        **meta,
-        "matrix": matrix,
-    }
-    with open(path, "w", encoding="utf-8") as f:
-        json.dump(out, f, ensure_ascii=False, indent=2)
+    stream_dump_matrix(path, stations, matrix, meta)
 
 def safe_float(x):
     if x is None:
@@ -54,21 +51,21 @@ def delete_old_outputs():
                 pass
     print(f"Deleted {deleted} old output file(s).")
 
-def main():
+def main(v=V, files=FILES, out=OUT, routes_file=ROUTES_FILE):
     delete_old_outputs()
 
     # Load required matrices
-    st_fc, FC, meta_fc = load_matrix(FILES["FC"])
-    st_cc, CC, meta_cc = load_matrix(FILES["CC"])
-    st_ft, FT, meta_ft = load_matrix(FILES["FT"])
-    st_ct, CT, meta_ct = load_matrix(FILES["CT"])
-    st_fr, FR, meta_fr = load_matrix(FILES["FR"])
+    st_fc, FC, meta_fc = load_matrix(files["FC"])
+    st_cc, CC, meta_cc = load_matrix(files["CC"])
+    st_ft, FT, meta_ft = load_matrix(files["FT"])
+    st_ct, CT, meta_ct = load_matrix(files["CT"])
+    st_fr, FR, meta_fr = load_matrix(files["FR"])
 
     # Cheapest transfers is optional
     CR = None
     meta_cr = {}
-    if os.path.exists(FILES["CR"]):
-        st_cr, CR, meta_cr = load_matrix(FILES["CR"])
+    if os.path.exists(files["CR"]):
+        st_cr, CR, meta_cr = load_matrix(files["CR"])
     else:
         print("Warning: cheapest_transfers.json not found -> transfers will remain fastest.")
 
@@ -86,6 +83,9 @@ def main():
     ET = [row[:] for row in FT]
     ER = [row[:] for row in FR]  # replaced only if cheapest transfers exists
 
+    # Per-leg itineraries: record which crawled course each "efficient" pair uses
+    store = RouteStore(routes_file) if routes_file and os.path.exists(routes_file) else None
+
     switched = 0
     switched_pairs = []  # optional: keep log
 
@@ -98,6 +98,9 @@ def main():
                 ER[i][j] = 0
                 continue
 
+            if store is not None:
+                store.copy(stations[i], stations[j], "fastest", "efficient")
+
             fc = safe_float(FC[i][j])
             cc = safe_float(CC[i][j])
             ft = safe_float(FT[i][j])
@@ -120,7 +123,7 @@ def main():
                 choose_cheapest = False
             else:
                 value = (A / B) * 60.0  # yen per hour saved
-                if value >= V:
+                if value >= v:
                     choose_cheapest = True
 
             if choose_cheapest:
@@ -128,18 +131,23 @@ def main():
                 ET[i][j] = CT[i][j]
                 if CR is not None:
                     ER[i][j] = CR[i][j]
+                if store is not None:
+                    store.copy(stations[i], stations[j], "cheapest", "efficient")
                 switched += 1
                 switched_pairs.append((stations[i], stations[j]))
 
+    if store is not None:
+        store.save()
+
     # Metadata for outputs
     rule_text = "Let A=FC-CC, B=CT-FT. If B<=0 choose cheapest; else if A<=0 keep fastest; else if (A/B)*60>=V choose cheapest."
     base_meta = {
         "mode": "efficient",
         "metric": "chosen per-pair using yen-per-hour-saved threshold",
-        "V": V,
+        "V": v,
         "rule": rule_text,
         "switched_pairs_count": switched,
-        "sources": FILES,
+        "sources": files,
         "date_time": {
             "fastest_cost": {"date": meta_fc.get("date"), "time": meta_fc.get("time")},
             "cheapest_cost": {"date": meta_cc.get("date"), "time": meta_cc.get("time")},
@@ -150,12 +158,12 @@ def main():
         },
     }
 
-    dump_matrix(OUT["EC"], stations, EC, base_meta | {"field": "cost_yen"})
-    dump_matrix(OUT["ET"], stations, ET, base_meta | {"field": "time_plus_transfers"})
-    dump_matrix(OUT["ER"], stations, ER, base_meta | {"field": "transfers"})
+    dump_matrix(out["EC"], stations, EC, base_meta | {"field": "cost_yen"})
+    dump_matrix(out["ET"], stations, ET, base_meta | {"field": "time_plus_transfers"})
+    dump_matrix(out["ER"], stations, ER, base_meta | {"field": "transfers"})
 
     print("Saved:")
-    for k, p in OUT.items():
+    for k, p in out.items():
         print(" ", p)
     print(f"\nSwitched {switched} directed pairs to cheapest (out of {n*(n-1)}).")
 
@@ -1,20 +1,19 @@
-import requests
+from station_index import INDEX_FILE, SEED, fetch_stations, load_index
+
 KEY = "API_KEY_HERE"
-STATION_API = "https://api.ekispert.jp/v1/json/station"
-station_list =["飯田橋", "東京", "渋谷", "秋葉原", "浅草", "上野", "池袋", "六本木", "銀座", "新宿", "赤羽橋"]
-def as_list(x):
-    return x if isinstance(x, list) else ([] if x is None else [x])
+# romaji -> Japanese name, from the single SEED list in station_index.py
+station_list = {romaji: name for romaji, name, _code in SEED}
 
-def station_code(name: str) -> str:
-    r = requests.get(STATION_API, params={"key": KEY, "name": name, "limit": 1}, timeout=20)
-    r.raise_for_status()
-    point = r.json().get("ResultSet", {}).get("Point")
-    point = point[0] if isinstance(point, list) and point else point
+def main():
+    index = load_index()
+    missing = {romaji: name for romaji, name in station_list.items() if name not in index}
+    for entry in fetch_stations(missing, key=KEY):
+        index.add(**entry)
+    index.save(INDEX_FILE)
 
-    code = (point or {}).get("Station", {}).get("code") or (point or {}).get("Station", {}).get("Code")
-    if not code:
-        raise ValueError(f"Station not found / no code: {name}")
-    return str(code)
+    for name in station_list.values():
+        print(name, index.code(name))
+    print(f"Saved -> {INDEX_FILE} ({len(index)} stations)")
 
-for i in station_list:
-    print(station_code(i))
\ No newline at end of file
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,13 @@
 import json
+import os
 import numpy as np
 import time
 
+from heldKarp_array import SCALE, k_best_tsp_held_karp_array, check_compact
+from matrix_io import stream_load_matrix
+from route_store import ROUTES_FILE, RouteStore, itinerary
+from tour_cache import TourCache
+
 # ----------------------------
 # CONFIG (edit these paths)
 # ----------------------------
@@ -13,6 +19,12 @@ C_FILE = "Matrix/Efficient/cost.json"        # report "cost" totals from this ma
 R_FILE = "Matrix/Efficient/transfers.json"  
 START_STATION = "Iidabashi"
 K = 3  # top-k tours
+ENGINE = "dict"          # "dict" (reference DP) or "array" (HeldKarpTable)
+COST_DTYPE = "float64"   # array engine only: "float64", "float32" or "int32" (scaled integers)
+VERIFY_COMPACT = False   # also run a float64 solve to check a compact optimum (costs the float64 table)
+CACHE_FILE = "tour_cache.json"  # persistent result cache (None to disable)
+CACHE_MAX_ENTRIES = 128
+ROUTE_MODE = "efficient"  # which crawled course to show per leg ("fastest" / "cheapest" / "efficient")
 
 # ----------------------------
 # HELPERS
@@ -21,34 +33,47 @@ def load_json(path: str):
     with open(path, "r", encoding="utf-8") as f:
         return json.load(f)
 
-def load_matrix(path: str):
+def load_matrix(path: str, dtype=float):
     """
     Accepts either:
       - {"stations":[...], "matrix":[[...]...]}  (dict form)
       - [[...], [...]]                          (raw matrix list form)
+    Parsed row by row (see matrix_io.stream_load_matrix), so large
+    matrices never exist as Python lists of lists.
     Returns: (stations_or_None, numpy_matrix)
     """
-    data = load_json(path)
-    if isinstance(data, dict) and "matrix" in data:
-        stations = data.get("stations")
-        mat = np.array(data["matrix"], dtype=float)
-        return stations, mat
-    elif isinstance(data, list):
-        mat = np.array(data, dtype=float)
-        return None, mat
-    else:
-        raise ValueError(f"Unrecognized matrix JSON format in {path}")
+    stations, mat, _meta = stream_load_matrix(path, dtype=dtype)
+    return stations, mat
 
 def sum_along_path(M: np.ndarray, path: list[int]) -> float:
     return float(sum(M[a, b] for a, b in zip(path, path[1:])))
 
+def score_tours(tours, mats) -> np.ndarray:
+    """
+    Batch version of sum_along_path.
+      tours: (m, n+1) int array, one closed tour per row
+      mats:  (metrics, n, n) stacked matrices (e.g. np.stack([T, C, R]))
+    Returns: (m, metrics) array of totals, computed in one fancy-indexing call.
+    """
+    tours = np.asarray(tours, dtype=np.intp)
+    mats = np.asarray(mats, dtype=float)
+    if mats.ndim == 2:
+        mats = mats[None]
+    if tours.size == 0:
+        return np.zeros((0, mats.shape[0]))
+    legs = mats[:, tours[:, :-1], tours[:, 1:]]  # (metrics, m, n)
+    return legs.sum(axis=2).T
+
 def k_best_tsp_held_karp(W: np.ndarray, start: int = 0, k: int = 3):
     """
     Exact k-best TSP tours (directed/asymmetric supported) using Held–Karp DP.
     dp[(mask, j)] stores up to k best ways to reach j having visited mask.
+    NaN / inf cells (missing pairs) are treated as missing edges, so only
+    finite tours are returned.
     Returns list of (total_cost, path_indices) with path starting/ending at start.
     """
     n = W.shape[0]
+    ok = np.isfinite(W)
     ALL = (1 << n) - 1
     START_MASK = 1 << start
 
@@ -56,7 +81,7 @@ def k_best_tsp_held_karp(W: np.ndarray, start: int = 0, k: int = 3):
 
     # base: start -> j
     for j in range(n):
-        if j == start:
+        if j == start or not ok[start, j]:
             continue
         mask = START_MASK | (1 << j)
         dp[(mask, j)] = [(W[start, j], start, -1)]
@@ -76,7 +101,7 @@ def k_best_tsp_held_karp(W: np.ndarray, start: int = 0, k: int = 3):
 
             candidates = []
             for m in range(n):
-                if m == start or not (prev_mask & (1 << m)):
+                if m == start or not (prev_mask & (1 << m)) or not ok[m, j]:
                     continue
                 prev_list = dp.get((prev_mask, m))
                 if not prev_list:
@@ -91,7 +116,7 @@ def k_best_tsp_held_karp(W: np.ndarray, start: int = 0, k: int = 3):
     # close tours back to start
     closing = []
     for j in range(n):
-        if j == start:
+        if j == start or not ok[j, start]:
             continue
         lst = dp.get((ALL, j))
         if not lst:
@@ -132,46 +157,109 @@ def k_best_tsp_held_karp(W: np.ndarray, start: int = 0, k: int = 3):
     return results
 
 # ----------------------------
-# MAIN
+# SOLVE (importable; main() and cli.py both call these)
 # ----------------------------
-def main():
-    # Load objective W (from plain JSON like your example)
-    dataW = load_json(W_FILE)
-    stations = dataW["stations"]
-    W = np.array(dataW["matrix"], dtype=float)
-
-    start = stations.index(START_STATION)
+def solve_matrix(W: np.ndarray, start: int, k: int = K, reports: dict = None,
+                 engine: str = ENGINE, cost_dtype: str = COST_DTYPE, cache: TourCache = None,
+                 verify: bool = VERIFY_COMPACT):
+    """
+    k-best tours of W from start, each scored on the reporting matrices.
+    verify: with a compact cost_dtype, cross-check the optimum against float64
+    (check_compact); off by default since it builds the full float64 table too.
+    Returns list of {"w": total_W, "path": [...], "totals": {name: total}}.
+    """
+    reports = reports or {}
+    params = {"engine": engine}
+    if engine == "array":
+        params["cost_dtype"] = np.dtype(cost_dtype).name
+        if np.dtype(cost_dtype).kind in "iu":
+            params["scale"] = SCALE
+    if cache is not None:
+        tours = cache.get(W, start, k, reports, params)
+        if tours is not None:
+            cache.save()  # persist the hit's recency for LRU eviction
+            return tours
+
+    if engine == "array" and verify and cost_dtype != "float64":
+        best = check_compact(W, start=start, k=k, cost_dtype=np.dtype(cost_dtype))
+    elif engine == "array":
+        best = k_best_tsp_held_karp_array(W, start=start, k=k, cost_dtype=np.dtype(cost_dtype))
+    elif engine == "dict":
+        best = k_best_tsp_held_karp(W, start=start, k=k)
+    else:
+        raise ValueError(f"Unknown engine: {engine}")
+
+    names = list(reports)
+    tours = [{"w": best_w, "path": path, "totals": {}} for best_w, path in best]
+    if names:
+        scores = score_tours([path for _w, path in best], np.stack([reports[n] for n in names]))
+        for tour, row in zip(tours, scores):
+            tour["totals"] = {name: float(v) for name, v in zip(names, row)}
+
+    if cache is not None:
+        cache.put(W, start, k, tours, reports, params)
+        cache.save()
+    return tours
+
+def solve(w_file: str = W_FILE, t_file: str = T_FILE, c_file: str = C_FILE, r_file: str = R_FILE,
+          start_station: str = START_STATION, k: int = K, engine: str = ENGINE,
+          cost_dtype: str = COST_DTYPE, cache_file: str = CACHE_FILE, loader=stream_load_matrix,
+          verify: bool = VERIFY_COMPACT):
+    """
+    Load W and the T/C/R reporting matrices and solve.
+    `loader` must behave like matrix_io.stream_load_matrix; cli.py passes a
+    memoized one so repeated solves don't re-read the files.
+    Returns: (stations, W_meta, tours)
+    """
+    stations, W, metaW = loader(w_file)
+    start = stations.index(start_station)
 
     # Load reporting matrices (T/C/R) — can be same file or different
-    st_T, T = load_matrix(T_FILE)
-    st_C, C = load_matrix(C_FILE)
-    st_R, R = load_matrix(R_FILE)
-
-    # Verify station order matches, if provided in the files
-    for st, name in [(st_T, "T"), (st_C, "C"), (st_R, "R")]:
+    reports = {}
+    for name, path in [("T", t_file), ("C", c_file), ("R", r_file)]:
+        st, M, _meta = loader(path)
+        # Verify station order matches, if provided in the files
         if st is not None and st != stations:
             raise ValueError(f"Station order mismatch between W and {name} file.")
+        reports[name] = M
 
-    top3 = k_best_tsp_held_karp(W, start=start, k=K)
+    cache = TourCache(cache_file, max_entries=CACHE_MAX_ENTRIES) if cache_file else None
+    tours = solve_matrix(W, start, k, reports, engine, cost_dtype, cache, verify)
+    return stations, metaW, tours
 
-    print("Objective file (W):", W_FILE)
-    print("W metric:", dataW.get("metric"))
-    print()
-
-    for rank, (best_w, path) in enumerate(top3, start=1):
-        route_names = [stations[i] for i in path]
-
-        total_T = sum_along_path(T, path)
-        total_C = sum_along_path(C, path)
-        total_R = sum_along_path(R, path)
+def print_tours(stations: list[str], tours: list[dict], store: RouteStore = None, mode: str = ROUTE_MODE):
+    for rank, tour in enumerate(tours, start=1):
+        route_names = [stations[i] for i in tour["path"]]
+        totals = tour["totals"]
 
         print(f"#{rank}")
         print("Route:", " -> ".join(route_names))
-        print(f"Total W score: {best_w:.6f}")
-        print(f"Total time (T): {total_T:.2f}")
-        print(f"Total cost (C): {total_C:.0f}")
-        print(f"Total transfers (R): {total_R:.0f}")
+        print(f"Total W score: {tour['w']:.6f}")
+        print(f"Total time (T): {totals['T']:.2f}")
+        print(f"Total cost (C): {totals['C']:.0f}")
+        print(f"Total transfers (R): {totals['R']:.0f}")
+        if store is not None:
+            for leg in itinerary(store, stations, tour["path"], mode):
+                r = leg["route"]
+                if r is None:
+                    print(f"  {leg['from']} -> {leg['to']}: (no stored route)")
+                    continue
+                via = " / ".join(r["lines"]) or "walk"
+                print(f"  {leg['from']} -> {leg['to']}: {r['minutes']} min, {r['fare']} yen, "
+                      f"{r['transfers']} transfers via {via}")
         print("-" * 60)
 
+# ----------------------------
+# MAIN
+# ----------------------------
+def main():
+    stations, metaW, tours = solve()
+
+    print("Objective file (W):", W_FILE)
+    print("W metric:", metaW.get("metric"))
+    print()
+    store = RouteStore(ROUTES_FILE) if os.path.exists(ROUTES_FILE) else None
+    print_tours(stations, tours, store)
+
 if __name__ == "__main__":
     main()
@@ -35,9 +35,12 @@ def k_best_tsp_held_karp(W: np.ndarray, start: int = 0, k: int = 3):
     """
     Exact k-best TSP tours (directed/asymmetric supported) using Held–Karp DP.
     dp[(mask, j)] stores up to k best ways to reach j having visited mask.
+    NaN / inf cells (missing pairs) are treated as missing edges, so only
+    finite tours are returned.
     Returns list of (total_cost, path_indices) with path starting/ending at start.
     """
     n = W.shape[0]
+    ok = np.isfinite(W)
     ALL = (1 << n) - 1
     START_MASK = 1 << start
 
@@ -46,7 +49,7 @@ def k_best_tsp_held_karp(W: np.ndarray, start: int = 0, k: int = 3):
 
     # base: start -> j
     for j in range(n):
-        if j == start:
+        if j == start or not ok[start, j]:
             continue
         mask = START_MASK | (1 << j)
         dp[(mask, j)] = [(W[start, j], start, -1)]
@@ -66,7 +69,7 @@ def k_best_tsp_held_karp(W: np.ndarray, start: int = 0, k: int = 3):
 
             candidates = []
             for m in range(n):
-                if m == start or not (prev_mask & (1 << m)):
+                if m == start or not (prev_mask & (1 << m)) or not ok[m, j]:
                     continue
                 prev_list = dp.get((prev_mask, m))
                 if not prev_list:
@@ -81,7 +84,7 @@ def k_best_tsp_held_karp(W: np.ndarray, start: int = 0, k: int = 3):
     # close tours back to start
     closing = []
     for j in range(n):
-        if j == start:
+        if j == start or not ok[j, start]:
             continue
         lst = dp.get((ALL, j))
         if not lst:
@@ -128,43 +131,49 @@ def k_best_tsp_held_karp(W: np.ndarray, start: int = 0, k: int = 3):
 # ----------------------------
 W_FILE = "./Matrix/recommended_weighted_normalized.json"
 
-data = load_json(W_FILE)
-stations = data["stations"]
-W = np.array(data["matrix"], dtype=float)
 
-start = stations.index("Iidabashi")  # safer than assuming index 0
+def main():
+    data = load_json(W_FILE)
+    stations = data["stations"]
+    W = np.array(data["matrix"], dtype=float)
 
-# Load T/C/R from the "sources" inside your JSON
-src_T = data["sources"]["T"]
-src_C = data["sources"]["C"]
-src_R = data["sources"]["R"]
+    start = stations.index("Iidabashi")  # safer than assuming index 0
 
-st_T, T = load_matrix(src_T)
-st_C, C = load_matrix(src_C)
-st_R, R = load_matrix(src_R)
+    # Load T/C/R from the "sources" inside your JSON
+    src_T = data["sources"]["T"]
+    src_C = data["sources"]["C"]
+    src_R = data["sources"]["R"]
 
-# Optional: verify station order matches (if the source files include stations)
-for st, name in [(st_T, "T"), (st_C, "C"), (st_R, "R")]:
-    if st is not None and st != stations:
-        raise ValueError(f"Station order mismatch between W and {name} source file.")
+    st_T, T = load_matrix(src_T)
+    st_C, C = load_matrix(src_C)
+    st_R, R = load_matrix(src_R)
 
-top3 = k_best_tsp_held_karp(W, start=start, k=3)
+    # Optional: verify station order matches (if the source files include stations)
+    for st, name in [(st_T, "T"), (st_C, "C"), (st_R, "R")]:
+        if st is not None and st != stations:
+            raise ValueError(f"Station order mismatch between W and {name} source file.")
 
-print("Weights used:", data.get("weights"))
-print("Metric used:", data.get("metric"))
-print()
+    top3 = k_best_tsp_held_karp(W, start=start, k=3)
 
-for rank, (best_w, path) in enumerate(top3, start=1):
-    route_names = [stations[i] for i in path]
+    print("Weights used:", data.get("weights"))
+    print("Metric used:", data.get("metric"))
+    print()
 
-    total_time = sum_along_path(T, path)   # note: your file name suggests "time_plus_transfers"
-    total_cost = sum_along_path(C, path)
-    total_transfers = sum_along_path(R, path)
+    for rank, (best_w, path) in enumerate(top3, start=1):
+        route_names = [stations[i] for i in path]
 
-    print(f"#{rank}")
-    print("Route:", " -> ".join(route_names))
-    print(f"Total W score: {best_w:.6f}")
-    print(f"Total time (from {src_T}): {total_time:.2f}")
-    print(f"Total cost (yen): {total_cost:.0f}")
-    print(f"Total transfers: {total_transfers:.0f}")
-    print("-" * 60)
+        total_time = sum_along_path(T, path)   # note: your file name suggests "time_plus_transfers"
+        total_cost = sum_along_path(C, path)
+        total_transfers = sum_along_path(R, path)
+
+        print(f"#{rank}")
+        print("Route:", " -> ".join(route_names))
+        print(f"Total W score: {best_w:.6f}")
+        print(f"Total time (from {src_T}): {total_time:.2f}")
+        print(f"Total cost (yen): {total_cost:.0f}")
+        print(f"Total transfers: {total_transfers:.0f}")
+        print("-" * 60)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,286 @@
+from math import comb
+
+import numpy as np
+
+# ----------------------------
+# Array-backed k-best Held–Karp
+# ----------------------------
+# Same recurrence as heldKarp_algorithm.k_best_tsp_held_karp, but the table
+# lives in three dense arrays indexed by (mask, j, rank) instead of a dict of
+# tuples, so costs and backpointers can use compact dtypes:
+#   cost: float64 (default), float32, or scaled integers (int32/int64)
+#   pred/rank: uint8 while n-1 < 255 and k <= 256, otherwise uint16
+# Masks range over the n-1 non-start nodes only, so the table holds
+# 2^(n-1) * (n-1) * k entries.
+
+SCALE = 1000  # scaled-integer costs: round(W * SCALE); 3sf weights stay exact
+RELAX_CHUNK = 1 << 22  # max candidate entries materialized per relax step
+REBUILD_FRACTION = 0.5  # update_edges: recompute whole layers once this share of a layer is dirty
+
+
+def _index_dtype(m: int, k: int):
+    return np.uint8 if m < 255 and k <= 256 else np.uint16
+
+
+class HeldKarpTable:
+    """
+    Retained k-best Held–Karp DP table for one (W, start, k).
+
+    cost_dtype: np.float64 / np.float32, or an integer dtype (np.int32 /
+        np.int64) to store costs as round(W * scale) for exact comparisons.
+    index_dtype: dtype for predecessor / rank backpointers (None = smallest
+        that fits).
+    NaN / inf cells are treated as missing edges; only finite tours are
+    returned.
+    """
+
+    def __init__(self, W: np.ndarray, start: int = 0, k: int = 3,
+                 cost_dtype=np.float64, index_dtype=None, scale: int = SCALE):
+        W = np.asarray(W, dtype=float)
+        n = W.shape[0]
+        if W.shape != (n, n):
+            raise ValueError("Matrix size mismatch / not square.")
+        if n < 2:
+            raise ValueError("Need at least 2 stations.")
+
+        self.n = n
+        self.m = n - 1
+        self.start = start
+        self.k = k
+        self.others = [v for v in range(n) if v != start]
+        self.cost_dtype = np.dtype(cost_dtype)
+        self.index_dtype = np.dtype(index_dtype or _index_dtype(self.m, k))
+        if self.m > np.iinfo(self.index_dtype).max or k - 1 > np.iinfo(self.index_dtype).max:
+            raise ValueError(f"index_dtype {self.index_dtype} too small for n={n}, k={k}")
+
+        self.scaled = self.cost_dtype.kind in "iu"
+        self.scale = scale if self.scaled else 1
+        if self.scaled:
+            # sums of n finite legs must stay below INF, and INF + leg below dtype max
+            self.INF = self.cost_dtype.type(np.iinfo(self.cost_dtype).max // 4)
+        else:
+            self.INF = self.cost_dtype.type(np.inf)
+
+        self.W = W.copy()
+        self._set_weights()
+
+        m, full = self.m, (1 << self.m)
+        self.cost = np.full((full, m, k), self.INF, dtype=self.cost_dtype)
+        self.pred = np.zeros((full, m, k), dtype=self.index_dtype)
+        self.rank = np.zeros((full, m, k), dtype=self.index_dtype)
+
+        masks = np.arange(full)
+        self._popcount = np.zeros(full, dtype=np.int64)
+        for j in range(m):
+            self._popcount += (masks >> j) & 1
+            self._set_base(j)
+
+        # layer by layer: every (S, j) of one popcount only reads the layer below
+        self._rebuild_from(2)
+
+    # ----------------------------
+    # internals
+    # ----------------------------
+    def _to_cost(self, M: np.ndarray) -> np.ndarray:
+        M = np.where(np.isfinite(M), M, np.inf)
+        if not self.scaled:
+            return M.astype(self.cost_dtype)
+        finite = M[np.isfinite(M)]
+        if finite.size and np.abs(finite).max() * self.scale * self.n >= self.INF:
+            raise ValueError(f"scale={self.scale} overflows {self.cost_dtype} for this matrix")
+        out = np.full(M.shape, self.INF, dtype=self.cost_dtype)
+        ok = np.isfinite(M)
+        out[ok] = np.rint(M[ok] * self.scale).astype(self.cost_dtype)
+        return out
+
+    def _set_weights(self):
+        Wc = self._to_cost(self.W)
+        o = self.others
+        self.Woo = Wc[np.ix_(o, o)]        # (m, m) between non-start nodes
+        self.Wso = Wc[self.start, o]        # start -> j
+        self.Wos = Wc[o, self.start]        # j -> start
+
+    def _set_base(self, j: int):
+        S = 1 << j
+        self.cost[S, j] = self.INF
+        self.cost[S, j, 0] = self.Wso[j]
+        self.pred[S, j] = self.m  # m = "came from start"
+        self.rank[S, j] = 0
+
+    def _add(self, a, b):
+        if self.scaled:
+            return np.minimum(a + b, self.INF)
+        return a + b
+
+    def _layer_size(self, size: int) -> int:
+        """Number of (S, j) states with |S| = size."""
+        return comb(self.m, size) * size
+
+    def _rebuild_from(self, first: int):
+        """Relax every state of layers first..m (no change tracking)."""
+        m = self.m
+        masks = np.arange(1 << m)
+        for size in range(first, m + 1):
+            layer = masks[self._popcount == size]
+            Ss = np.concatenate([layer[(layer >> j) & 1 == 1] for j in range(m)])
+            js = np.concatenate([np.full(int(((layer >> j) & 1).sum()), j) for j in range(m)])
+            self._relax(Ss, js)
+
+    def _relax(self, Ss: np.ndarray, js: np.ndarray):
+        """
+        Recompute states (Ss[i], js[i]) from the layer below. All pairs must
+        come from the same layer; they are processed in bounded chunks.
+        """
+        m, k = self.m, self.k
+        step = max(1, RELAX_CHUNK // (m * k))
+        for lo in range(0, len(Ss), step):
+            S, j = Ss[lo:lo + step], js[lo:lo + step]
+            prevs = S ^ (1 << j)
+            # candidates in the same order as the dict engine: by pred node, then rank
+            cand = self._add(self.cost[prevs], self.Woo[:, j].T[:, :, None])  # (len, m, k)
+            flat = cand.reshape(len(S), m * k)
+            order = np.argsort(flat, axis=1, kind="stable")[:, :k]
+            self.cost[S, j] = np.take_along_axis(flat, order, axis=1)
+            self.pred[S, j] = order // k
+            self.rank[S, j] = order % k
+
+    # ----------------------------
+    # incremental update
+    # ----------------------------
+    def update_edges(self, changes: dict):
+        """
+        Apply new edge weights {(a, b): value} (original station indices) and
+        repair the table in place instead of re-solving.
+
+        Recomputed states: (S, b) for every S containing a (the only states
+        whose candidates use a->b), then, layer by layer, the successors of
+        any state whose entries actually changed. Changes into start only
+        affect the closing step.
+        When the dirty states exceed REBUILD_FRACTION of the table (up front)
+        or of a layer (during propagation), that layer and every layer above
+        it are recomputed in full instead, which skips the change tracking.
+        Returns the updated k-best tours.
+        """
+        m, full = self.m, 1 << self.m
+        pos = {v: i for i, v in enumerate(self.others)}
+        masks = np.arange(full)
+
+        for (a, b), value in changes.items():
+            self.W[a, b] = np.nan if value is None else value
+        self._set_weights()
+
+        # pending pair keys S * m + j, per layer
+        pending = [[] for _ in range(m + 1)]
+        changed = np.zeros(0, dtype=np.int64)  # masks of the previous layer with changed states
+        for (a, b) in changes:
+            if a == b or b == self.start:
+                continue
+            if a == self.start:
+                self._set_base(pos[b])
+                changed = np.append(changed, 1 << pos[b])
+                continue
+            both = (1 << pos[a]) | (1 << pos[b])
+            Ss = masks[(masks & both) == both]
+            for size in np.unique(self._popcount[Ss]):
+                pending[size].append(Ss[self._popcount[Ss] == size] * m + pos[b])
+
+        total = sum(self._layer_size(size) for size in range(2, m + 1))
+        if sum(len(p) for layer in pending for p in layer) > REBUILD_FRACTION * total:
+            self._rebuild_from(2)
+            return self.tours()
+
+        for size in range(2, m + 1):
+            # successors of last layer's changed states
+            for j in range(m):
+                src = changed[(changed >> j) & 1 == 0]
+                if src.size:
+                    pending[size].append((src | (1 << j)) * m + j)
+            if not pending[size]:
+                changed = np.zeros(0, dtype=np.int64)
+                continue
+
+            keys = np.unique(np.concatenate(pending[size]))
+            if len(keys) > REBUILD_FRACTION * self._layer_size(size):
+                self._rebuild_from(size)
+                break
+            Ss, js = keys // m, keys % m
+            old = (self.cost[Ss, js], self.pred[Ss, js], self.rank[Ss, js])
+            self._relax(Ss, js)
+            diff = ((old[0] != self.cost[Ss, js]) | (old[1] != self.pred[Ss, js])
+                    | (old[2] != self.rank[Ss, js])).any(axis=1)
+            changed = np.unique(Ss[diff])
+
+        return self.tours()
+
+    # ----------------------------
+    # results
+    # ----------------------------
+    def tours(self, k: int = None):
+        """
+        Return list of (total_cost, path_indices) like k_best_tsp_held_karp.
+        With a compact cost dtype the k paths are re-scored on self.W in
+        float64, so totals match the dict engine instead of the stored sums.
+        """
+        k = self.k if k is None else min(k, self.k)
+        m, full = self.m, (1 << self.m) - 1
+        closing = self._add(self.cost[full], self.Wos[:, None]).reshape(-1)
+        order = np.argsort(closing, kind="stable")
+
+        results = []
+        for idx in order[:k]:
+            total = closing[idx]
+            if total >= self.INF:
+                break
+            j, r = divmod(int(idx), self.k)
+            S = full
+            rev = [self.others[j]]
+            while True:
+                p = int(self.pred[S, j, r])
+                if p == m:
+                    break
+                r = int(self.rank[S, j, r])
+                S ^= 1 << j
+                j = p
+                rev.append(self.others[j])
+            path = [self.start] + rev[::-1] + [self.start]
+            results.append((float(total) / self.scale, path))
+
+        if self.cost_dtype != np.float64:
+            results = [(float(sum(self.W[a, b] for a, b in zip(p, p[1:]))), p) for _c, p in results]
+            results.sort(key=lambda r: r[0])  # stable: compact-order ties stay put
+        return results
+
+    @property
+    def nbytes(self) -> int:
+        return self.cost.nbytes + self.pred.nbytes + self.rank.nbytes
+
+
+def k_best_tsp_held_karp_array(W: np.ndarray, start: int = 0, k: int = 3,
+                               cost_dtype=np.float64, index_dtype=None, scale: int = SCALE):
+    """Array-backed drop-in for k_best_tsp_held_karp (see HeldKarpTable)."""
+    return HeldKarpTable(W, start, k, cost_dtype, index_dtype, scale).tours()
+
+
+def check_compact(W: np.ndarray, start: int = 0, k: int = 3,
+                  cost_dtype=np.float32, index_dtype=None, scale: int = SCALE, tol: float = 1e-9):
+    """
+    Solve with a compact cost dtype and verify the optimum is unchanged
+    against the float64 table: the compact best tour must have the same
+    exact (float64) length as the float64 optimum.
+    Returns the compact results; raises ValueError on a mismatch.
+    """
+    W = np.asarray(W, dtype=float)
+    ref = k_best_tsp_held_karp_array(W, start, k)
+    got = k_best_tsp_held_karp_array(W, start, k, cost_dtype, index_dtype, scale)
+    if not ref and not got:
+        return got
+    if not ref or not got:
+        raise ValueError(f"{np.dtype(cost_dtype)} found {len(got)} tours, float64 found {len(ref)}")
+
+    path = got[0][1]
+    exact = float(sum(W[a, b] for a, b in zip(path, path[1:])))
+    if abs(exact - ref[0][0]) > tol * max(1.0, abs(ref[0][0])):
+        raise ValueError(
+            f"{np.dtype(cost_dtype)} optimum {exact!r} differs from float64 optimum {ref[0][0]!r}"
+        )
+    return got
@@ -1,22 +1,17 @@
 # pip install requests
 import requests
 
+from station_index import SEED, load_index
+
 KEY = "test_ba3CYJYscMP"
 COURSE_API = "https://api.ekispert.jp/v1/json/search/course/extreme"
 
-station_list = {
-    "Iidabashi": 22507,
-    "Tokyo": 22828,
-    "Shibuya": 22715,
-    "Akihabara": 22492,
-    "Asakusa": 22495,
-    "Ueno": 22528,
-    "Ikebukuro": 22513,
-    "Roppongi": 23049,
-    "Ginza": 22641,
-    "Shinjuku": 22741,
-    "Akabanebashi": 29341,
-}
+# Station codes come from the local index (station_index.py / get_id.py);
+# STATIONS (from station_index.SEED) picks which stations, in what order,
+# the matrices cover.
+INDEX = load_index()
+STATIONS = [romaji for romaji, _name, _code in SEED]
+station_list = {name: INDEX.code(name) for name in STATIONS}
 
 def as_list(x):
     return x if isinstance(x, list) else ([] if x is None else [x])
@@ -36,8 +31,9 @@ def parse_course(course: dict):
     return {"minutes": minutes, "transfers": transfers, "fare": fare, "lines": lines}
 
 def get_routes(frm_key: str, to_key: str, date=20251128, time=1200, answer_count=20):
-    frm = station_list[frm_key]
-    to = station_list[to_key]
+    # accepts romaji, Japanese names, kana readings or codes
+    frm = station_list.get(frm_key) or INDEX.code(frm_key)
+    to = station_list.get(to_key) or INDEX.code(to_key)
     via = f"{frm}:{to}"
 
     r = requests.get(
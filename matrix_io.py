@@ -0,0 +1,162 @@
+import json
+import math
+
+import numpy as np
+
+CHUNK = 1 << 16  # characters read per refill
+
+_decoder = json.JSONDecoder()
+_DELIMS = " \t\r\n,:]}"
+
+
+class _Reader:
+    """Minimal pull-reader over a text file for the matrix JSON format."""
+
+    def __init__(self, f):
+        self.f = f
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self):
+        chunk = self.f.read(CHUNK)
+        if not chunk:
+            self.eof = True
+            return False
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self) -> str:
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in " \t\r\n":
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._fill():
+                return ""
+
+    def expect(self, ch: str):
+        got = self.peek()
+        if got != ch:
+            raise ValueError(f"Expected {ch!r} in matrix JSON, got {got!r}")
+        self.pos += 1
+
+    def value(self):
+        """Decode one JSON value, refilling the buffer until it is complete."""
+        self.peek()
+        while True:
+            try:
+                obj, end = _decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                if self._fill():
+                    continue
+                raise
+            # a number can be cut in half at a chunk boundary ("3" of "3.4")
+            cut = end == len(self.buf) or self.buf[end] not in _DELIMS
+            if cut and not self.eof and self._fill():
+                continue
+            self.pos = end
+            return obj
+
+
+def _read_rows(rd: _Reader, n, dtype):
+    """Parse '[[...], [...]]' one row at a time into a preallocated buffer."""
+    rd.expect("[")
+    mat = None
+    i = 0
+    if rd.peek() == "]":
+        rd.pos += 1
+        return np.zeros((0, 0), dtype=dtype)
+    while True:
+        row = rd.value()
+        if mat is None:
+            n = len(row) if n is None else n
+            mat = np.empty((n, n), dtype=dtype)
+        if i >= n or len(row) != n:
+            raise ValueError("Matrix size mismatch / not square.")
+        mat[i] = [math.nan if v is None else v for v in row]
+        i += 1
+        sep = rd.peek()
+        rd.pos += 1
+        if sep == "]":
+            break
+        if sep != ",":
+            raise ValueError(f"Expected ',' or ']' in matrix JSON, got {sep!r}")
+    if i != n:
+        raise ValueError("Matrix size mismatch / not square.")
+    return mat
+
+
+def stream_load_matrix(path: str, dtype=np.float64):
+    """
+    Streaming counterpart of load_matrix: parses the matrix row by row
+    straight into an (n, n) array of `dtype`, so peak memory stays close
+    to the final array instead of a full list-of-lists.
+    Accepts the same two forms:
+      - {"stations":[...], "matrix":[[...]...], ...}
+      - [[...], [...]]
+    None cells become NaN.
+    Returns: (stations_or_None, numpy_matrix, meta_dict)
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        rd = _Reader(f)
+        if rd.peek() == "[":
+            return None, _read_rows(rd, None, dtype), {}
+
+        rd.expect("{")
+        stations = None
+        mat = None
+        meta = {}
+        if rd.peek() == "}":
+            raise ValueError(f"Unrecognized matrix JSON format in {path}")
+        while True:
+            key = rd.value()
+            rd.expect(":")
+            if key == "matrix":
+                n = len(stations) if stations is not None else None
+                mat = _read_rows(rd, n, dtype)
+            else:
+                val = rd.value()
+                if key == "stations":
+                    stations = val
+                else:
+                    meta[key] = val
+            sep = rd.peek()
+            rd.pos += 1
+            if sep == "}":
+                break
+            if sep != ",":
+                raise ValueError(f"Expected ',' or '}}' in {path}, got {sep!r}")
+
+    if mat is None:
+        raise ValueError(f"Unrecognized matrix JSON format in {path}")
+    return stations, mat, meta
+
+
+def _cell(v):
+    if v is None:
+        return "null"
+    v = float(v)
+    if not math.isfinite(v):  # NaN / inf mark missing pairs; bare inf is not JSON
+        return "null"
+    return str(int(v)) if v.is_integer() else repr(v)
+
+
+def stream_dump_matrix(path: str, stations, matrix, meta: dict = None):
+    """
+    Streaming counterpart of dump_matrix: writes the header with json.dumps
+    and then the matrix one row per line, so no full JSON string is built.
+    NaN / inf / None cells are written as null (read back as NaN).
+    """
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("{\n")
+        f.write(f'  "stations": {json.dumps(stations, ensure_ascii=False)},\n')
+        for key, val in (meta or {}).items():
+            f.write(f"  {json.dumps(key)}: {json.dumps(val, ensure_ascii=False)},\n")
+        f.write('  "matrix": [')
+        for i, row in enumerate(matrix):
+            f.write(",\n    [" if i else "\n    [")
+            f.write(", ".join(_cell(v) for v in row))
+            f.write("]")
+        f.write("\n  ]\n}\n")
@@ -0,0 +1,71 @@
+import json
+import os
+
+ROUTES_FILE = "Matrix/routes.json"
+
+
+class RouteStore:
+    """
+    Chosen course per (frm, to, mode), as recorded by the crawl.
+
+    Line names are interned into one table, so each leg is stored as
+    [frm, to, mode, minutes, fare, transfers, [line ids]].
+    Lookups are a single dict access.
+    """
+
+    def __init__(self, path: str = None):
+        self.path = path
+        self.lines = []         # line id -> name
+        self._line_ids = {}     # name -> line id
+        self.legs = {}          # (frm, to, mode) -> (minutes, fare, transfers, (line ids))
+        if path and os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            self.lines = data["lines"]
+            self._line_ids = {name: i for i, name in enumerate(self.lines)}
+            for frm, to, mode, minutes, fare, transfers, ids in data["legs"]:
+                self.legs[(frm, to, mode)] = (minutes, fare, transfers, tuple(ids))
+
+    def _line_id(self, name: str) -> int:
+        i = self._line_ids.get(name)
+        if i is None:
+            i = self._line_ids[name] = len(self.lines)
+            self.lines.append(name)
+        return i
+
+    def add(self, frm: str, to: str, mode: str, route: dict):
+        """route: a main.parse_course() dict (minutes, fare, transfers, lines)."""
+        ids = tuple(self._line_id(name) for name in route.get("lines", []))
+        self.legs[(frm, to, mode)] = (route["minutes"], route["fare"], route["transfers"], ids)
+
+    def copy(self, frm: str, to: str, src_mode: str, dst_mode: str):
+        """Point dst_mode at src_mode's leg; drops dst_mode if src_mode was never crawled."""
+        leg = self.legs.get((frm, to, src_mode))
+        if leg is None:
+            self.legs.pop((frm, to, dst_mode), None)
+        else:
+            self.legs[(frm, to, dst_mode)] = leg
+
+    def get(self, frm: str, to: str, mode: str):
+        leg = self.legs.get((frm, to, mode))
+        if leg is None:
+            return None
+        minutes, fare, transfers, ids = leg
+        return {"minutes": minutes, "fare": fare, "transfers": transfers,
+                "lines": [self.lines[i] for i in ids]}
+
+    def save(self):
+        if not self.path:
+            return
+        legs = [[frm, to, mode, *leg[:3], list(leg[3])] for (frm, to, mode), leg in self.legs.items()]
+        with open(self.path, "w", encoding="utf-8") as f:
+            json.dump({"lines": self.lines, "legs": legs}, f, ensure_ascii=False)
+
+
+def itinerary(store: RouteStore, stations: list[str], path: list[int], mode: str) -> list[dict]:
+    """Expand a tour into per-leg details; legs missing from the store have route None."""
+    legs = []
+    for a, b in zip(path, path[1:]):
+        frm, to = stations[a], stations[b]
+        legs.append({"from": frm, "to": to, "route": store.get(frm, to, mode)})
+    return legs
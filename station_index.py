@@ -0,0 +1,234 @@
+import bisect
+import csv
+import difflib
+import json
+import os
+import unicodedata
+from concurrent.futures import ThreadPoolExecutor
+
+INDEX_FILE = "stations_index.json"
+STATION_API = "https://api.ekispert.jp/v1/json/station"
+
+# The one station list: (romaji, Japanese name, Ekispert code or None), in
+# matrix order. main.STATIONS and get_id.station_list are derived from it.
+# To add a station, append it with code None and run get_id.py to resolve it
+# into the index file.
+SEED = [
+    ("Iidabashi", "飯田橋", 22507),
+    ("Tokyo", "東京", 22828),
+    ("Shibuya", "渋谷", 22715),
+    ("Akihabara", "秋葉原", 22492),
+    ("Asakusa", "浅草", 22495),
+    ("Ueno", "上野", 22528),
+    ("Ikebukuro", "池袋", 22513),
+    ("Roppongi", "六本木", 23049),
+    ("Ginza", "銀座", 22641),
+    ("Shinjuku", "新宿", 22741),
+    ("Akabanebashi", "赤羽橋", 29341),
+]
+
+_MACRONS = str.maketrans("āēīōūâêîôû", "aeiouaeiou")
+
+
+def normalize(s: str) -> str:
+    """Lookup key: NFKC, case-folded, macrons dropped, no spaces/punctuation/駅 suffix."""
+    s = unicodedata.normalize("NFKC", str(s)).casefold().translate(_MACRONS)
+    s = "".join(ch for ch in s if ch.isalnum())
+    for suffix in ("駅", "station"):
+        if s.endswith(suffix) and len(s) > len(suffix):
+            s = s[: -len(suffix)]
+    return s
+
+
+def as_list(x):
+    return x if isinstance(x, list) else ([] if x is None else [x])
+
+
+class StationIndex:
+    """
+    Local station lookup: codes <-> Japanese names <-> romanized names
+    (and kana readings when known), with prefix and fuzzy search.
+    Each entry is {"code": int, "name": str, "romaji": str|None, "yomi": str|None}.
+    """
+
+    def __init__(self, entries: list[dict] = None):
+        self.entries = []
+        self._by_key = {}   # normalized name/romaji/yomi -> entry
+        self._by_code = {}  # code -> entry
+        self._keys = []     # sorted normalized keys, for prefix search
+        for e in entries or []:
+            self.add(**e)
+
+    @classmethod
+    def from_seed(cls):
+        return cls([{"code": code, "name": name, "romaji": romaji} for romaji, name, code in SEED if code])
+
+    @classmethod
+    def load(cls, path: str = INDEX_FILE):
+        with open(path, "r", encoding="utf-8") as f:
+            return cls(json.load(f)["stations"])
+
+    @classmethod
+    def from_dump(cls, path: str):
+        """Build from a downloaded dump: JSON list of entries, or CSV with code,name[,romaji,yomi]."""
+        if path.endswith(".csv"):
+            with open(path, "r", encoding="utf-8", newline="") as f:
+                rows = list(csv.DictReader(f))
+        else:
+            with open(path, "r", encoding="utf-8") as f:
+                rows = json.load(f)
+            rows = rows.get("stations", rows) if isinstance(rows, dict) else rows
+        return cls([
+            {"code": r["code"], "name": r["name"], "romaji": r.get("romaji") or None, "yomi": r.get("yomi") or None}
+            for r in rows
+        ])
+
+    def save(self, path: str = INDEX_FILE):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"stations": self.entries}, f, ensure_ascii=False, indent=2)
+
+    def add(self, code, name: str, romaji: str = None, yomi: str = None):
+        code = int(code)
+        entry = self._by_code.get(code)
+        if entry is None:
+            entry = {"code": code, "name": name, "romaji": romaji, "yomi": yomi}
+            self.entries.append(entry)
+            self._by_code[code] = entry
+        else:
+            # keep what we already know, fill in what we didn't
+            entry["name"] = name or entry["name"]
+            entry["romaji"] = romaji or entry["romaji"]
+            entry["yomi"] = yomi or entry["yomi"]
+        for s in (entry["name"], entry["romaji"], entry["yomi"]):
+            if s:
+                key = normalize(s)
+                if key not in self._by_key:
+                    bisect.insort(self._keys, key)
+                self._by_key[key] = entry
+        return entry
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, query):
+        try:
+            self.resolve(query)
+            return True
+        except KeyError:
+            return False
+
+    # ----------------------------
+    # lookups
+    # ----------------------------
+    def resolve(self, query) -> dict:
+        """Exact lookup by code, Japanese name, romaji or reading. Raises KeyError with suggestions."""
+        if isinstance(query, int) or str(query).isdigit():
+            entry = self._by_code.get(int(query))
+        else:
+            entry = self._by_key.get(normalize(query))
+        if entry is None:
+            hints = [e["romaji"] or e["name"] for e in self.fuzzy(query, limit=3)]
+            hint = f" (did you mean: {', '.join(hints)}?)" if hints else ""
+            raise KeyError(f"Station not found: {query}{hint}")
+        return entry
+
+    def code(self, query) -> int:
+        return self.resolve(query)["code"]
+
+    def prefix(self, query: str, limit: int = 10) -> list[dict]:
+        key = normalize(query)
+        out = []
+        i = bisect.bisect_left(self._keys, key)
+        while i < len(self._keys) and self._keys[i].startswith(key) and len(out) < limit:
+            entry = self._by_key[self._keys[i]]
+            if entry not in out:
+                out.append(entry)
+            i += 1
+        return out
+
+    def fuzzy(self, query: str, limit: int = 5, cutoff: float = 0.6) -> list[dict]:
+        out = []
+        for key in difflib.get_close_matches(normalize(query), self._keys, n=limit * 3, cutoff=cutoff):
+            entry = self._by_key[key]
+            if entry not in out:
+                out.append(entry)
+        return out[:limit]
+
+    def search(self, query: str, limit: int = 10) -> list[dict]:
+        """Exact match first, then prefix matches, then fuzzy matches."""
+        out = []
+        try:
+            out.append(self.resolve(query))
+        except KeyError:
+            pass
+        for entry in self.prefix(query, limit) + self.fuzzy(query, limit):
+            if entry not in out:
+                out.append(entry)
+        return out[:limit]
+
+
+def load_index(path: str = INDEX_FILE) -> StationIndex:
+    """The built index if present (plus any coded SEED stations it lacks), else the seed list."""
+    index = StationIndex.from_seed()
+    if path and os.path.exists(path):
+        for entry in StationIndex.load(path).entries:
+            index.add(**entry)
+    return index
+
+
+# ----------------------------
+# BUILD FROM API
+# ----------------------------
+def _parse_points(data: dict) -> list[dict]:
+    out = []
+    for point in as_list(data.get("ResultSet", {}).get("Point")):
+        st = (point or {}).get("Station", {})
+        code = st.get("code") or st.get("Code")
+        if code:
+            out.append({"code": int(code), "name": st.get("Name"), "yomi": st.get("Yomi")})
+    return out
+
+
+def fetch_stations(names, key: str, workers: int = 8) -> list[dict]:
+    """
+    Resolve many station names concurrently over one HTTP session.
+    names: list of Japanese names, or {romaji: Japanese name} to record both.
+    """
+    import requests
+
+    pairs = list(names.items()) if isinstance(names, dict) else [(None, n) for n in names]
+    session = requests.Session()
+
+    def one(pair):
+        romaji, name = pair
+        r = session.get(STATION_API, params={"key": key, "name": name, "limit": 1}, timeout=20)
+        r.raise_for_status()
+        points = _parse_points(r.json())
+        if not points:
+            raise ValueError(f"Station not found / no code: {name}")
+        return {**points[0], "romaji": romaji}
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(one, pairs))
+
+
+def fetch_prefecture(key: str, prefecture_code: int = 13, page: int = 100) -> list[dict]:
+    """All train stations in one prefecture (13 = Tokyo), paged `page` at a time."""
+    import requests
+
+    session = requests.Session()
+    out = []
+    offset = 1
+    while True:
+        r = session.get(
+            STATION_API,
+            params={"key": key, "prefectureCode": prefecture_code, "type": "train",
+                    "offset": offset, "limit": page},
+            timeout=20,
+        )
+        r.raise_for_status()
+        points = _parse_points(r.json())
+        out.extend(points)
+        if len(points) < page:
+            return out
+        offset += page
@@ -0,0 +1,155 @@
+import hashlib
+import json
+import os
+import tempfile
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: saves still atomic, just not merged under a lock
+    fcntl = None
+
+import numpy as np
+
+
+def matrix_hash(M: np.ndarray) -> str:
+    """
+    Hash of the matrix contents (shape + float64 bytes), so the same
+    matrix loaded from JSON twice always maps to the same key.
+    """
+    M = np.ascontiguousarray(M, dtype=np.float64)
+    h = hashlib.sha1()
+    h.update(str(M.shape).encode("ascii"))
+    h.update(M.tobytes())
+    return h.hexdigest()
+
+
+def cache_key(W: np.ndarray, start: int, reports: dict = None, params: dict = None) -> str:
+    """
+    Key = hash(W) + start + hashes of the reporting matrices (T/C/R)
+    + solver parameters (engine, cost_dtype, scale, ...), since compact
+    dtypes can report slightly different totals for the same tours.
+    K is deliberately NOT part of the key: an entry solved for a larger K
+    also answers every smaller K.
+    """
+    parts = [matrix_hash(W), str(int(start))]
+    for name in sorted(reports or {}):
+        parts.append(f"{name}={matrix_hash(reports[name])}")
+    for name in sorted(params or {}):
+        parts.append(f"{name}={params[name]}")
+    return "|".join(parts)
+
+
+@contextmanager
+def _locked(path: str):
+    if fcntl is None:
+        yield
+        return
+    with open(path, "a") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def _read_entries(path: str) -> list:
+    if not os.path.exists(path):
+        return []
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f).get("entries", [])
+
+
+def _by_last_used(items) -> OrderedDict:
+    """Oldest first; entries written before last_used existed count as oldest."""
+    return OrderedDict(sorted(items, key=lambda kv: kv[1].get("last_used", 0)))
+
+
+class TourCache:
+    """
+    Persistent k-best tour cache in front of k_best_tsp_held_karp.
+
+    Each entry stores the K it was solved for, a "last_used" timestamp and,
+    per tour, {"w": total_W, "path": [...], "totals": {"T": ..., "C": ..., "R": ...}}.
+    Hits and puts refresh last_used; once max_entries is exceeded the least
+    recently used entries are evicted.
+
+    Several processes may share one cache file: save() merges the entries
+    this process put or hit with what is on disk under a lock (newest
+    last_used wins) and replaces the file via a unique temp file.
+    """
+
+    def __init__(self, path: str = None, max_entries: int = 128):
+        self.path = path
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self._touched = set()  # keys put or hit since the last save()
+        self._cleared = False
+        if path:
+            self.entries = _by_last_used(_read_entries(path))
+
+    def _touch(self, key: str):
+        self.entries[key]["last_used"] = time.time()
+        self.entries.move_to_end(key)
+        self._touched.add(key)
+
+    def get(self, W: np.ndarray, start: int, k: int, reports: dict = None, params: dict = None):
+        """Return the cached top-k tours, or None if no entry has K >= k."""
+        key = cache_key(W, start, reports, params)
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        # a smaller K than was solved is just a prefix; fewer tours than the
+        # solved K means the matrix has no more tours, so that is complete too
+        if entry["k"] < k and len(entry["tours"]) >= entry["k"]:
+            return None
+        self._touch(key)
+        return entry["tours"][:k]
+
+    def put(self, W: np.ndarray, start: int, k: int, tours: list[dict], reports: dict = None,
+            params: dict = None):
+        key = cache_key(W, start, reports, params)
+        old = self.entries.get(key)
+        if old is None or old["k"] < k:
+            self.entries[key] = {"k": int(k), "tours": tours}
+        self._touch(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def clear(self):
+        self.entries.clear()
+        self._touched.clear()
+        self._cleared = True  # next save() drops what is on disk instead of merging
+
+    def save(self):
+        """Write the entries touched since the last save; no-op when nothing changed."""
+        if not self.path or not (self._touched or self._cleared):
+            return
+        folder = os.path.dirname(os.path.abspath(self.path))
+        with _locked(self.path + ".lock"):
+            merged = {} if self._cleared else dict(_read_entries(self.path))
+            for key in self._touched:
+                entry = self.entries.get(key)
+                if entry is None:  # evicted locally before it was saved
+                    continue
+                old = merged.get(key)
+                if old is not None and old["k"] > entry["k"]:
+                    entry = {**old, "last_used": max(old.get("last_used", 0), entry["last_used"])}
+                merged[key] = entry
+            merged = _by_last_used(merged.items())
+            while len(merged) > self.max_entries:
+                merged.popitem(last=False)
+            self.entries = merged
+            self._touched.clear()
+            self._cleared = False
+
+            fd, tmp = tempfile.mkstemp(dir=folder, prefix=os.path.basename(self.path) + ".", suffix=".tmp")
+            try:
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    json.dump({"entries": list(merged.items())}, f, ensure_ascii=False)
+                os.replace(tmp, self.path)
+            except BaseException:
+                os.remove(tmp)
+                raise